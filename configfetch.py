@@ -2,7 +2,6 @@
 """Helper to get values from configparser and argparse."""
 
 import argparse
-from collections import OrderedDict
 import configparser
 import os
 import re
@@ -24,6 +23,11 @@ BOOLEAN_STATES = {
 
 _STRING_RE = re.compile(r"""(["'])(.+)\1$""")
 
+# ``shlex.split`` special characters (quotes, escape and comment)
+# and words split by its whitespaces
+_SHLEX_SPECIAL_RE = re.compile(r"""["'\\#]""")
+_SHLEX_WORD_RE = re.compile(r'[^ \t\r\n]+')
+
 
 class Error(Exception):
     """Base Exception class for the module."""
@@ -61,38 +65,35 @@ def _parse_bool(value):
     return BOOLEAN_STATES[value]
 
 
-# following Mohammad Azim's advice
-# https://stackoverflow.com/a/43137914
+# Separators not preceded by '\\' (``_escaped_split``)
+_ESCAPED_SPLIT_RE = {
+    ',': re.compile(r'(?<!\\),'),
+    '\n': re.compile(r'(?<!\\)\n'),
+}
+
+
 def _escaped_split(string, char):
-    out = []
-    part = []
-    escape = False
-    for c in string:
-        if c == char:
-            if escape:
-                part[-1] = c  # pop the last character ('\\'), and add 'char'
-            else:
-                out.append(part)
-                part = []
-        else:
-            part.append(c)
-        escape = (c == '\\')
-    if part:
-        out.append(part)
-    return [''.join(part) for part in out]
+    # '\\' + char is a literal char, the '\\' is discarded.
+    escaped = '\\' + char
+    if escaped not in string:
+        return string.split(char)
+    return [part.replace(escaped, char)
+        for part in _ESCAPED_SPLIT_RE[char].split(string)]
 
 
 def _parse_comma(value):
-    return [v.strip() for v in _escaped_split(value, ',') if v.strip()]
+    return [v for v in (v.strip() for v in _escaped_split(value, ',')) if v]
 
 
 def _parse_line(value):
-    return [v.strip() for v in _escaped_split(value, '\n') if v.strip()]
+    return [v for v in (v.strip() for v in _escaped_split(value, '\n')) if v]
 
 
 class Func(object):
     """Register and apply value conversions."""
 
+    __slots__ = ('name', '_ctx', '_fmts', 'values', '__weakref__')
+
     def __init__(self, name, ctx, fmts):
         self.name = name
         self._ctx = ctx
@@ -139,6 +140,8 @@ class Func(object):
     @register
     def cmd(self, value):
         """Return a list of strings, useful for ``subprocess`` (stdlib)."""
+        if not _SHLEX_SPECIAL_RE.search(value):
+            return _SHLEX_WORD_RE.findall(value)
         return shlex.split(value, comments='#')
 
     @register
@@ -248,14 +251,48 @@ class FiniOptionBuilder(object):
     ARGS_PREFIX = '::'
     ARGS_SHORTNAMES = {'f': 'func'}
 
+    # value conversions for args, applied in order
+    ARGS_TYPES = {
+        'names': ('comma',),
+        'action': (),
+        'nargs': ('number',),
+        'const': ('number', 'bool'),
+        'default': ('number', 'bool'),
+        'type': ('eval',),
+        'choices': ('comma', 'number'),
+        'required': ('bool',),
+        'help': (),
+        'metavar': (),
+        'dest': (),
+        'func': ('comma',),
+    }
+
+    # compiled regexes, keyed by (HELP_PREFIX, ARGS_PREFIX)
+    _prefix_re_cache = {}
+
     def __init__(self, conf):
         self._config = conf._config
         self._conf = conf
+        self._help_re, self._args_re = self._get_prefix_re()
+        self._converters = {
+            'comma': _parse_comma,
+            'number': self._number_or_string,
+            'bool': self._bool_or_string,
+            'eval': eval,
+        }
 
-        # Note: require a space (' ') for nonblank values
-        comp = re.compile
-        self._help_re = comp(r'^\s*(%s)(?: (.+))*$' % self.HELP_PREFIX)
-        self._args_re = comp(r'^\s*(%s)(?: (.+))*\s*$' % self.ARGS_PREFIX)
+    @classmethod
+    def _get_prefix_re(cls):
+        # Compile once per prefix pair, not on every ``fetch``.
+        key = (cls.HELP_PREFIX, cls.ARGS_PREFIX)
+        if key not in cls._prefix_re_cache:
+            # Note: require a space (' ') for nonblank values
+            comp = re.compile
+            cls._prefix_re_cache[key] = (
+                comp(r'^\s*(%s)(?: (.+))*$' % cls.HELP_PREFIX),
+                comp(r'^\s*(%s)(?: (.+))*\s*$' % cls.ARGS_PREFIX),
+            )
+        return cls._prefix_re_cache[key]
 
     def parse(self, input_):
         """Parse input and build conifg data and metadata."""
@@ -291,14 +328,25 @@ class FiniOptionBuilder(object):
             ctx[option]['func'] = args['func']
 
     def _parse_args(self, value):
+        if self.HELP_PREFIX not in value and self.ARGS_PREFIX not in value:
+            return {'argparse': {}, 'func': {}}, self._parse_value(value)
+
         help_ = []
         args = {'argparse': {}, 'func': {}}
         option_value = []
         state = 'root'  # root -> (help) -> (argparse) -> (func) -> value
         error_fmt = 'Invalid line at: %r'
 
+        prefixes = (self.HELP_PREFIX, self.ARGS_PREFIX)
         for line in value.split('\n'):
-            if line.strip() == '' and state not in ('help', 'value'):
+            stripped = line.strip()
+            if stripped == '' and state not in ('help', 'value'):
+                continue
+
+            # Only lines starting with the prefixes can match the regexes.
+            if not stripped.startswith(prefixes):
+                state = 'value'
+                option_value.append(stripped)
                 continue
 
             m = self._help_re.match(line)
@@ -331,7 +379,7 @@ class FiniOptionBuilder(object):
                 continue
 
             state = 'value'
-            option_value.append(line.strip())
+            option_value.append(stripped)
 
         option_value = '\n'.join(option_value)
         if help_:
@@ -339,6 +387,14 @@ class FiniOptionBuilder(object):
         self._set_argparse_suppress(args)
         return args, option_value
 
+    def _parse_value(self, value):
+        # Shortcut for values with no metadata lines.
+        # The same as ``_parse_args``, skip blank lines only at the start.
+        lines = [line.strip() for line in value.split('\n')]
+        while lines and lines[0] == '':
+            lines.pop(0)
+        return '\n'.join(lines)
+
     def _convert_arg(self, key, val):
         key, val = key.strip(), val.strip()
         if key in self.ARGS_SHORTNAMES:
@@ -346,32 +402,8 @@ class FiniOptionBuilder(object):
         return key, self._convert_arg_value(key, val)
 
     def _convert_arg_value(self, key, val):
-        arg_type = {
-            'names': 'comma',
-            'action': '',
-            'nargs': 'number',
-            'const': 'number, bool',
-            'default': 'number, bool',
-            'type': 'eval',
-            'choices': 'comma, number',
-            'required': 'bool',
-            'help': '',
-            'metavar': '',
-            'dest': '',
-            'func': 'comma',
-        }
-        for conv in arg_type[key].split(','):
-            conv = conv.strip()
-            if not conv:
-                continue
-            if conv == 'comma':
-                val = _parse_comma(val)
-            if conv == 'number':
-                val = self._number_or_string(val)
-            if conv == 'bool':
-                val = self._bool_or_string(val)
-            if conv == 'eval':
-                val = eval(val)
+        for conv in self.ARGS_TYPES[key]:
+            val = self._converters[conv](val)
         return val
 
     def _number_or_string(self, string):
@@ -421,15 +453,20 @@ class ArgumentBuilder(object):
                 self._build(argument_parser, section, option)
 
     def _build(self, parser, section, option):
-        args = self._ctx.get(option, {}).get('argparse')
+        ctx = self._ctx.get(option)
+        if not ctx:
+            return
+        args = ctx.get('argparse')
         if not args or not args.get('help'):
             return
 
-        names = args.pop('names', None) or []
+        # Copy, not to consume the metadata (for repeated builds).
+        args = args.copy()
+        names = list(args.pop('names', None) or [])
         names.append(option)
         names = self._build_argument_names(names)
 
-        func = self._ctx.get(option, {}).get('func')
+        func = ctx.get('func')
         if func and 'bool' in func:
             const = 'no' if args.get('dest') else 'yes'
             bool_arg = {
@@ -482,7 +519,8 @@ class ConfigFetch(object):
     Additional argumants are:
 
     :param fmts: dictionay ``Func._fmt`` uses
-    :param args: ``argparse.Namespace`` object
+    :param args: ``argparse.Namespace`` object,
+        or a dictionary with option name and value as key and value
     :param envs: dictionary with option name and Environment Variable name
         as key and value
     :param Func: ``Func`` or subclasses, worker to keep and look-up functions
@@ -490,19 +528,35 @@ class ConfigFetch(object):
         worker to build value and metadata from data input
     :param parser: ``ConfigParser`` or a subclass,
         keep actual config values
+    :param freeze: if ``True``, keep a dictionary copy of config values
+        after each ``fetch``, and get values from it.
+        Changes made to the parser directly are not seen
+        until the next ``fetch``
     """
 
+    __slots__ = (
+        '_fmts', '_args', '_args_dict', '_envs', '_env_values',
+        '_Func', '_option_builder', '_parser', '_ctx', '_cache',
+        '_optionxform', '_config', '_freeze', '_frozen',
+        'read', 'read_file', 'read_string', 'read_dict',
+        '__weakref__',
+    )
+
     def __init__(self, *, fmts=None, args=None, envs=None,
             Func=Func, option_builder=FiniOptionBuilder,
-            parser=configparser.ConfigParser, **kwargs):
+            parser=configparser.ConfigParser, freeze=False, **kwargs):
         self._fmts = fmts or {}
-        self._args = args or argparse.Namespace()
+        self._args = args if args is not None else argparse.Namespace()
+        self._args_dict = self._get_args_dict(self._args)
         self._envs = envs or {}
+        self._env_values = self._get_env_values()
         self._Func = Func
         self._option_builder = option_builder
         self._parser = parser
         self._ctx = {}  # option -> metadata dict
         self._cache = {}  # SectionProxy object cache
+        self._freeze = freeze
+        self._frozen = None  # section -> option -> value dict
 
         self._optionxform = self._get_optionxform()
         self._config = parser(**kwargs)
@@ -517,6 +571,8 @@ class ConfigFetch(object):
         """
         option_builder = self._option_builder(self)
         self._ctx.update(option_builder.parse(input_))
+        if self._freeze:
+            self._freeze_values()
 
         # shortcut
         self.read = self._config.read
@@ -524,6 +580,10 @@ class ConfigFetch(object):
         self.read_string = self._config.read_string
         self.read_dict = self._config.read_dict
 
+    def _freeze_values(self):
+        # Note 'ConfigParser.__iter__()' includes default section.
+        self._frozen = {sec: dict(self._config[sec]) for sec in self._config}
+
     def _get_optionxform(self):
         def _xform(option):
             return option
@@ -542,23 +602,48 @@ class ConfigFetch(object):
         ArgumentBuilder(self).build(argument_parser, sections)
         return argument_parser
 
+    def _get_env_values(self):
+        values = {}
+        for option, env in self._envs.items():
+            if env and env in os.environ:
+                values[option] = os.environ[env]
+        return values
+
+    def reload_envs(self):
+        """Read Environment Variables again.
+
+        Their values are read once, on initialization.
+        Call this if they have changed afterwards.
+        """
+        self._env_values = self._get_env_values()
+
     def set_arguments(self, namespace):
         """Set ``_args`` attribute.
 
-        :param namespace: ``argparse.Namespace`` object
+        :param namespace: ``argparse.Namespace`` object, or a dictionary
 
         It manually sets ``_args`` again, after initialization.
         """
         self._args = namespace
+        self._args_dict = self._get_args_dict(namespace)
+
+    def _get_args_dict(self, args):
+        # ``Namespace`` keeps attributes in ``__dict__`` (the same object).
+        if isinstance(args, dict):
+            return args
+        if not args:
+            return {}
+        return vars(args)
 
     # TODO: Invalidate attribute names this class uses.
     # cf. set(dir(configfetch.fetch(''))) - set(dir(object()))
     def __getattr__(self, section):
-        if section not in self._cache:
+        s = self._cache.get(section)
+        if s is None:
             s = SectionProxy(
                 self, section, self._ctx, self._fmts, self._Func)
             self._cache[section] = s
-        return self._cache[section]
+        return s
 
     def get(self, section):
         try:
@@ -585,6 +670,14 @@ class SectionProxy(object):
         self._fmts = fmts
         self._Func = Func
 
+        # Skip ``_get_section`` calls, if subclasses don't override it.
+        if type(self)._get_section is SectionProxy._get_section:
+            self._section = section
+        else:
+            self._section = None
+
+        self._plain_access = _has_default_access(self)
+
         # 'ConfigParser.__contains__()' includes default section.
         if self._get_section() not in self._config:
             raise NoSectionError(self._get_section())
@@ -595,28 +688,28 @@ class SectionProxy(object):
         return self.name
 
     def _get_conf(self, option, fallback=_UNSET, convert=False):
-        section = self._get_section(option)
-        try:
-            value = self._config.get(section, option)
-        except configparser.NoOptionError:
-            return fallback
+        section = self._section or self._get_section(option)
+        frozen = self._conf._frozen
+        if frozen is not None:
+            value = frozen.get(section, {}).get(
+                self._config.optionxform(option), _UNSET)
+            if value is _UNSET:
+                return fallback
+        else:
+            try:
+                value = self._config.get(section, option)
+            except configparser.NoOptionError:
+                return fallback
 
         if convert:
             value = self._convert(option, (value, _UNSET, _UNSET))
         return value
 
     def _get_arg(self, option):
-        if self._conf._args and option in self._conf._args:
-            return getattr(self._conf._args, option)
-        return _UNSET
+        return self._conf._args_dict.get(option, _UNSET)
 
     def _get_env(self, option):
-        env = None
-        if self._conf._envs and option in self._conf._envs:
-            env = self._conf._envs[option]
-        if env and env in os.environ:
-            return os.environ[env]
-        return _UNSET
+        return self._conf._env_values.get(option, _UNSET)
 
     def _get_values(self, option):
         return [self._get_arg(option),
@@ -624,9 +717,32 @@ class SectionProxy(object):
                 self._get_conf(option)]
 
     def __getattr__(self, option):
+        if self._plain_access and self._is_plain(option):
+            value = self._get_conf(option)
+            if value is _UNSET:
+                raise NoOptionError(option, self.name)
+            return value
         values = self._get_values(option)
         return self._convert(option, values)
 
+    # The same as ``__getattr__``, but return ``_UNSET`` for missing options.
+    # Plain options are looked up without raising and catching NoOptionError.
+    def _get_raw(self, option):
+        if self._plain_access and self._is_plain(option):
+            return self._get_conf(option)
+        try:
+            return self.__getattr__(option)
+        except NoOptionError:
+            return _UNSET
+
+    # Options with no ``arg``, ``env`` or functions
+    # can return config values directly.
+    def _is_plain(self, option):
+        conf = self._conf
+        return (option not in conf._args_dict
+            and option not in conf._env_values
+            and not self._ctx.get(option, {}).get('func'))
+
     def _convert(self, option, values):
         # ``arg`` may have non-string value.
         # it returns it as is (not raising Error).
@@ -646,23 +762,38 @@ class SectionProxy(object):
         return self._Func(self.name, self._ctx, self._fmts)
 
     def get(self, option, fallback=_UNSET):
-        try:
+        if fallback is _UNSET:
             return self.__getattr__(option)
-        except NoOptionError:
-            if fallback is _UNSET:
-                raise
-            else:
-                return fallback
+        value = self._get_raw(option)
+        return fallback if value is _UNSET else value
 
     # Note it does not do any reverse-formatting.
     def set_value(self, option, value):
         section = self._get_section(option)
         self._config.set(section, option, value)
+        if self._conf._frozen is not None:
+            self._conf._freeze_values()
 
     def __iter__(self):
         return self._config[self.name].__iter__()
 
 
+def _has_default_access(proxy):
+    """Check ``SectionProxy`` and ``Func`` don't customize value selection."""
+    methods = (
+        (SectionProxy, ('__getattr__', '_get_values', '_get_arg', '_get_env',
+            '_convert', '_get_func_class')),
+        (Func, ('__call__', '_get_value', '_format_value',
+            '_get_func', '_get_funcname')),
+    )
+    for base, names in methods:
+        cls = type(proxy) if base is SectionProxy else proxy._Func
+        for name in names:
+            if getattr(cls, name) is not getattr(base, name):
+                return False
+    return True
+
+
 class Double(object):
     """Supply a parent section fallback, before 'DEFAULT'.
 
@@ -677,6 +808,8 @@ class Double(object):
     :param parent_sec: ``SectionProxy`` object to fallback
     """
 
+    __slots__ = ('sec', 'parent_sec', '__weakref__')
+
     def __init__(self, sec, parent_sec):
         self.sec = sec
         self.parent_sec = parent_sec
@@ -693,16 +826,14 @@ class Double(object):
 
         # spec:
         # No preference between blank values. Just returns parent one.
-        try:
-            val = self.sec.get(option)
-        except NoOptionError:
+        val = self.sec._get_raw(option)
+        if val is _UNSET:
             return self.parent_sec.get(option)
 
         if val in (None, '', []):
-            try:
-                return self.parent_sec.get(option)
-            except NoOptionError:
-                pass
+            parent_val = self.parent_sec._get_raw(option)
+            if parent_val is not _UNSET:
+                return parent_val
 
         return val
 
@@ -733,7 +864,7 @@ class Double(object):
 def fetch(input_, *, encoding=None,
         fmts=None, args=None, envs=None, Func=Func,
         parser=configparser.ConfigParser, option_builder=FiniOptionBuilder,
-        **kwargs):
+        freeze=False, **kwargs):
     """Fetch ``ConfigFetch`` object.
 
     It is a convenience function for the basic use of the library.
@@ -748,7 +879,7 @@ def fetch(input_, *, encoding=None,
     :param encoding: encoding to use when opening the input
     """
     conf = ConfigFetch(fmts=fmts, args=args, envs=envs, Func=Func,
-        parser=parser, option_builder=option_builder)
+        parser=parser, option_builder=option_builder, freeze=freeze)
 
     if issubclass(option_builder, FiniOptionBuilder):
         if isinstance(input_, str) and os.path.isfile(input_):
@@ -768,10 +899,7 @@ def _get_plusminus_values(adjusts, initial=None):
     :param adjusts: lists of values to process in order
     :param initial: initial values (list) to add or subtract further
     """
-    def _fromkeys(keys):
-        return OrderedDict.fromkeys(keys)
-
-    values = _fromkeys(initial) if initial else _fromkeys([])
+    values = dict.fromkeys(initial) if initial else {}
 
     for adjust in adjusts:
         # if not adjust:
@@ -782,18 +910,17 @@ def _get_plusminus_values(adjusts, initial=None):
             raise ValueError(fmt % (type(adjust), adjust))
         adjust = _parse_comma(adjust)
 
-        if not any([a.startswith(('+', '-')) for a in adjust]):
-            values = _fromkeys(adjust)
+        if not any(a.startswith(('+', '-')) for a in adjust):
+            values = dict.fromkeys(adjust)
             continue
 
         for a in adjust:
             cmd, a = a[:1], a[1:]
+            # Re-setting an existing key doesn't change dict order.
             if a and cmd == '+':
-                if a not in values:
-                    values[a] = None
+                values[a] = None
             elif a and cmd == '-':
-                if a in values:
-                    del values[a]
+                values.pop(a, None)
             else:
                 fmt = ('Input members must be '
                     "'+something' or '-something', or none of them. Got %r.")
@@ -848,16 +975,19 @@ def minusadapter(parser, matcher=None, args=None):
     if not parser.prefix_chars == '-':
         return args
 
-    actions = []
+    if matcher:
+        matcher = re.compile(matcher)
+
+    actions = set()
     classes = (argparse._StoreAction, argparse._AppendAction)
     for a in parser._actions:
         if isinstance(a, classes):
             if a.nargs in (1, None):
                 for opt in a.option_strings:
                     if matcher:
-                        if not re.match(matcher, opt):
+                        if not matcher.match(opt):
                             continue
-                    actions.append(opt)
+                    actions.add(opt)
 
     args = args if args else sys.argv[1:]
     return list(_iter_args(args, actions))
@@ -895,11 +1025,7 @@ class ConfigPrinter(object):
             return d
 
         def build_option(option, value, ctx):
-            d = {}
-            for key in ctx:
-                if key == option:
-                    for k, v in ctx[key].items():
-                        d[k] = v
+            d = dict(ctx.get(option) or {})
             if value is not None:
                 d['value'] = value
             return d
@@ -3,6 +3,7 @@ import argparse
 import configparser
 import functools
 import textwrap
+import weakref
 
 import pytest
 
@@ -22,52 +23,51 @@ def _get_action(conf, option_strings):
     parser = argparse.ArgumentParser(prog='test')
     conf.build_arguments(parser)
     # parser.print_help()
-    for action in parser._get_optional_actions():
-        if option_strings in action.option_strings:
-            return action
-    raise ValueError('No action with option_strings: %r' % option_strings)
+    action = parser._option_string_actions.get(option_strings)
+    if action is None:
+        raise ValueError('No action with option_strings: %r' % option_strings)
+    return action
 
 
 class TestEscapedSplit:
 
-    def check_comma(self, value, expected):
-        ret = configfetch._parse_comma(value)
-        assert ret == expected
+    @pytest.mark.parametrize('value, expected', [
+        ('aaaa', ['aaaa']),
+        (r'\aaaa', [r'\aaaa']),
+        (r'aa\aa', [r'aa\aa']),
+        (r'aaa\a', [r'aaa\a']),
+        (r'aaaa\\', [r'aaaa\\']),
 
-    def check_line(self, value, expected):
-        ret = configfetch._parse_line(value)
-        assert ret == expected
+        (r'aa\\aa', [r'aa\\aa']),
+        (r'aa\\\aa', [r'aa\\\aa']),
 
-    def test_comma(self):
-        self.check_comma('aaaa', ['aaaa'])
-        self.check_comma(r'\aaaa', [r'\aaaa'])
-        self.check_comma(r'aa\aa', [r'aa\aa'])
-        self.check_comma(r'aaa\a', [r'aaa\a'])
-        self.check_comma(r'aaaa\\', [r'aaaa\\'])
+        ('aa, bb', ['aa', 'bb']),
+        (r'aa\, bb', ['aa, bb']),
+        (r'aa\\, bb', [r'aa\, bb']),
+        (r'aa\\\, bb', [r'aa\\, bb']),
 
-        self.check_comma(r'aa\\aa', [r'aa\\aa'])
-        self.check_comma(r'aa\\\aa', [r'aa\\\aa'])
+        (r'aa\a, bb', [r'aa\a', 'bb']),
+        (r'aa\\a, bb', [r'aa\\a', 'bb']),
+        (r'aa\\\a, bb', [r'aa\\\a', 'bb']),
 
-        self.check_comma('aa, bb', ['aa', 'bb'])
-        self.check_comma(r'aa\, bb', ['aa, bb'])
-        self.check_comma(r'aa\\, bb', [r'aa\, bb'])
-        self.check_comma(r'aa\\\, bb', [r'aa\\, bb'])
+        (',aa', ['aa']),
+        ('aa,', ['aa']),
+        ('aa,,', ['aa']),
+    ])
+    def test_comma(self, value, expected):
+        assert configfetch._parse_comma(value) == expected
 
-        self.check_comma(r'aa\a, bb', [r'aa\a', 'bb'])
-        self.check_comma(r'aa\\a, bb', [r'aa\\a', 'bb'])
-        self.check_comma(r'aa\\\a, bb', [r'aa\\\a', 'bb'])
+    @pytest.mark.parametrize('value, expected', [
+        ('aa\nbb', ['aa', 'bb']),
+        ('aa\\\nbb', ['aa\nbb']),
+        ('aa\\\\\nbb', ['aa\\\nbb']),
+        ('aa\\\\\\\nbb', ['aa\\\\\nbb']),
 
-        self.check_comma(',aa', ['aa'])
-        self.check_comma('aa,', ['aa'])
-        self.check_comma('aa,,', ['aa'])
+        ('aa\nbb,', ['aa', 'bb,']),
+    ])
+    def test_line(self, value, expected):
+        assert configfetch._parse_line(value) == expected
 
-    def test_line(self):
-        self.check_line('aa\nbb', ['aa', 'bb'])
-        self.check_line('aa\\\nbb', ['aa\nbb'])
-        self.check_line('aa\\\\\nbb', ['aa\\\nbb'])
-        self.check_line('aa\\\\\\\nbb', ['aa\\\\\nbb'])
-
-        self.check_line('aa\nbb,', ['aa', 'bb,'])
 
 class TestInheritance:
 
@@ -408,6 +408,68 @@ class TestParseConfig:
         assert conf.sec1.aa == '/home/john/data/my.css'
 
 
+class TestFreeze:
+
+    def test_freeze(self):
+        data = f("""
+        [DEFAULT]
+        aa = xxx
+        [sec1]
+        bb = :: f: comma
+             yyy1, yyy2
+        """)
+        conf = fetch(data, freeze=True)
+        assert conf.sec1.aa == 'xxx'
+        assert conf.sec1.bb == ['yyy1', 'yyy2']
+        with pytest.raises(configfetch.NoOptionError):
+            assert conf.sec1.cc == ''
+
+    def test_freeze_set_value(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, freeze=True)
+        conf.sec1.set_value('aa', 'yyy')
+        assert conf.sec1.aa == 'yyy'
+
+    def test_freeze_fetch_again(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, freeze=True)
+        conf._config.read_string('[sec1]\naa = yyy')
+        assert conf.sec1.aa == 'xxx'
+        conf.fetch('[sec1]\naa = zzz')
+        assert conf.sec1.aa == 'zzz'
+
+    def test_freeze_new_section(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, freeze=True)
+        conf._config.read_string('[sec2]\nbb = yyy')
+        with pytest.raises(configfetch.NoOptionError):
+            assert conf.sec2.bb == 'yyy'
+        conf.fetch('')
+        assert conf.sec2.bb == 'yyy'
+
+    def test_freeze_optionxform(self):
+        class LowerConfigFetch(configfetch.ConfigFetch):
+            def _get_optionxform(self):
+                return str.lower
+
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = LowerConfigFetch(freeze=True)
+        conf.fetch(data)
+        assert conf.sec1.AA == 'xxx'
+
+
 class TestParseContexts:
 
     def test_ctx_default_bool(self):
@@ -557,6 +619,61 @@ class TestArgparse:
         conf = fetch(data, args=args)
         assert conf.sec1.ee_eee == 'axxx'
 
+    def test_args_dict_and_conf(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        bb = yyy
+        """)
+        conf = fetch(data, args={'aa': 'axxx', 'bb': None})
+        assert conf.sec1.aa == 'axxx'
+        assert conf.sec1.bb == 'yyy'
+
+    def test_args_empty_dict(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        args = {}
+        conf = fetch(data, args=args)
+        assert conf.sec1.aa == 'xxx'
+        args['aa'] = 'axxx'
+        assert conf.sec1.aa == 'axxx'
+
+    def test_set_arguments_none(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, args={'aa': 'axxx'})
+        conf.set_arguments(None)
+        assert conf.sec1.aa == 'xxx'
+
+
+class TestEnvs:
+
+    def test_envs_and_conf(self, monkeypatch):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        monkeypatch.setenv('CONFIGFETCH_TEST_AA', 'exxx')
+        conf = fetch(data, envs={'aa': 'CONFIGFETCH_TEST_AA'})
+        assert conf.sec1.aa == 'exxx'
+
+    def test_reload_envs(self, monkeypatch):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        monkeypatch.delenv('CONFIGFETCH_TEST_AA', raising=False)
+        conf = fetch(data, envs={'aa': 'CONFIGFETCH_TEST_AA'})
+        assert conf.sec1.aa == 'xxx'
+        monkeypatch.setenv('CONFIGFETCH_TEST_AA', 'exxx')
+        assert conf.sec1.aa == 'xxx'
+        conf.reload_envs()
+        assert conf.sec1.aa == 'exxx'
+
 
 class _CustomFunc(configfetch.Func):
     """Used the test below."""
@@ -566,6 +683,29 @@ class _CustomFunc(configfetch.Func):
         return 'test'
 
 
+class _UpperFunc(configfetch.Func):
+    """Used the test below."""
+
+    def _format_value(self, option, values, func):
+        value = super()._format_value(option, values, func)
+        return value.upper()
+
+
+class _UpperGetFunc(configfetch.Func):
+    """Used the test below."""
+
+    def _get_func(self, option):
+        return super()._get_func(option) + [str.upper]
+
+
+class _MissingFunc(configfetch.Func):
+    """Used the test below."""
+
+    @configfetch.register
+    def missing(self, value):
+        raise configfetch.NoOptionError('missing', self.name)
+
+
 class TestCustomize:
 
     def test_customfunc(self):
@@ -577,6 +717,45 @@ class TestCustomize:
         conf = fetch(data, Func=_CustomFunc)
         assert conf.sec1.aa == 'test'
 
+    def test_custom_format_value(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, Func=_UpperFunc)
+        assert conf.sec1.aa == 'XXX'
+
+    def test_custom_get_func(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data, Func=_UpperGetFunc)
+        assert conf.sec1.aa == 'XXX'
+
+    def test_custom_func_nooption(self):
+        data = f("""
+        [sec1]
+        aa = :: f: missing
+             xxx
+        """)
+        conf = fetch(data, Func=_MissingFunc)
+        with pytest.raises(configfetch.NoOptionError):
+            assert conf.sec1.aa == 'xxx'
+        assert conf.sec1.get('aa', 'zzz') == 'zzz'
+
+    def test_weakref(self):
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf = fetch(data)
+        assert weakref.ref(conf)() is conf
+        func = configfetch.Func('sec1', {}, {})
+        assert weakref.ref(func)() is func
+        double = configfetch.Double(conf.sec1, conf.sec1)
+        assert weakref.ref(double)() is double
+
 
 class TestDouble:
 
@@ -595,6 +774,40 @@ class TestDouble:
         with pytest.raises(configfetch.NoOptionError):
             assert double.bb == 'zzz'
 
+    def test_nooption_value(self):
+        data = f("""
+        [sec1]
+        bb = xxx
+        """)
+        conf1 = fetch(data)
+        data = f("""
+        [sec1]
+        aa = yyy
+        """)
+        conf2 = fetch(data)
+        double = configfetch.Double(conf2.sec1, conf1.sec1)
+        assert double.bb == 'xxx'
+        assert conf2.sec1.get('bb', 'zzz') == 'zzz'
+
+    def test_custom_getattr(self):
+        class VirtualProxy(configfetch.SectionProxy):
+            def __getattr__(self, option):
+                if option == 'virtual':
+                    return 'V'
+                return super().__getattr__(option)
+
+        data = f("""
+        [sec1]
+        aa = xxx
+        """)
+        conf1 = fetch(data)
+        conf2 = fetch(data)
+        proxy = VirtualProxy(conf2, 'sec1', conf2._ctx, {}, configfetch.Func)
+        assert proxy.virtual == 'V'
+        assert proxy.get('virtual', 'FB') == 'V'
+        double = configfetch.Double(proxy, conf1.sec1)
+        assert double.virtual == 'V'
+
     def test_nooption_blank(self):
         data = f("""
         [sec1]
@@ -821,6 +1034,19 @@ class TestBuildArgs:
         assert isinstance(action, argparse._StoreAction)
         assert action.option_strings == ['-a', '--aa']
 
+    def test_names_build_twice(self):
+        data = f("""
+        [sec1]
+        aa = : help string
+             :: names: a
+             true
+        """)
+        conf = fetch(data)
+        _get_action(conf, '--aa')
+        action = _get_action(conf, '--aa')
+        assert action.option_strings == ['-a', '--aa']
+        assert conf._ctx['aa']['argparse']['names'] == ['a']
+
     def test_bool(self):
         data = f("""
         [sec1]